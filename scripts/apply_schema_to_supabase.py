@@ -5,6 +5,7 @@ Connect to Supabase and test the NBA stats database setup
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -75,19 +76,39 @@ def test_tables(supabase: Client):
         ('total_stats', ['player_id', 'season', 'total_points', 'overall_rank'])
     ]
     
+    def probe_table(test_table):
+        # Return the exception instead of raising so every probe reports back
+        table_name, expected_columns = test_table
+        try:
+            # Selecting just the expected columns verifies them even on an empty table
+            return supabase.table(table_name).select(','.join(expected_columns)).limit(1).execute(), True
+        except Exception:
+            pass
+        # A column is missing (or the table is inaccessible) - fetch a full row to report which
+        try:
+            return supabase.table(table_name).select("*").limit(1).execute(), False
+        except Exception as e:
+            return e, False
+    
+    # The probes are independent round trips, so issue them concurrently
+    with ThreadPoolExecutor(max_workers=len(test_tables)) as executor:
+        results = list(executor.map(probe_table, test_tables))
+    
     all_success = True
     
-    for table_name, expected_columns in test_tables:
+    for (table_name, expected_columns), (result, columns_verified) in zip(test_tables, results):
         try:
-            # Test basic table access
-            result = supabase.table(table_name).select("*").limit(1).execute()
+            if isinstance(result, Exception):
+                raise result
             
             # Check if we got data structure back (even if empty)
             if hasattr(result, 'data'):
                 print(f"   ✅ {table_name}: Accessible (contains {len(result.data)} records)")
                 
                 # Test specific column access if table has data
-                if result.data:
+                if columns_verified:
+                    print("      ✅ All expected columns present")
+                elif result.data:
                     available_columns = list(result.data[0].keys())
                     missing_columns = [col for col in expected_columns if col not in available_columns]
                     
@@ -96,7 +117,9 @@ def test_tables(supabase: Client):
                     else:
                         print(f"      ✅ All expected columns present")
                 else:
-                    print(f"      📄 Table is empty (will test columns after data import)")
+                    # The projected select failed, so at least one expected column doesn't exist
+                    print(f"      ❌ Missing expected columns (selecting {expected_columns} failed)")
+                    all_success = False
             else:
                 print(f"   ❌ {table_name}: Unexpected response structure")
                 all_success = False
@@ -5,13 +5,58 @@ Script to check Luka Doncic's position on ESPN using different API approaches
 
 import os
 import sys
-import requests
-import json
+import orjson
+import requests_cache
+import re
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from espn_api_client import ESPNFantasyClient
 from nba_api_client import NBAApiClient
 
+# Shared session so the concurrent endpoint probes reuse keep-alive connections;
+# responses are cached on disk so repeated investigation runs don't re-download them
+session = requests_cache.CachedSession(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'espn_probe_cache'),
+    backend='sqlite',
+    expire_after=3600,
+    allowable_methods=('GET',)
+)
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.3))
+session.mount('http://', _adapter)
+session.mount('https://', _adapter)
+
+YEAR_RE = re.compile(r'\b(2018|2019|2020|2021|2022|2023|2024)\b')
+
+def _iter_strings(obj):
+    """Yield every string leaf (keys and values) of a parsed JSON document"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield key
+            yield from _iter_strings(value)
+    elif isinstance(obj, list):
+        for item in obj:
+            yield from _iter_strings(item)
+    elif isinstance(obj, str):
+        yield obj
+
+def fetch_endpoints(endpoints, timeout):
+    """Fetch endpoints concurrently, returning a response or exception per endpoint in order"""
+    def fetch_one(endpoint):
+        try:
+            # Stream so error bodies (often large HTML 404 pages) are never downloaded
+            response = session.get(endpoint, timeout=timeout, stream=True)
+            if response.status_code != 200:
+                response.close()
+            return response
+        except Exception as e:
+            return e
+    
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(fetch_one, endpoints))
+
 def test_espn_fantasy_endpoints():
     """Test ESPN Fantasy API endpoints for player data"""
     print("🔍 Testing ESPN Fantasy API Endpoints...")
@@ -35,22 +80,27 @@ def test_espn_fantasy_endpoints():
         "https://site.web.api.espn.com/apis/site/v2/sports/basketball/nba/athletes",
     ]
     
-    for endpoint in fantasy_endpoints:
+    responses = fetch_endpoints(fantasy_endpoints, timeout=10)
+    
+    for endpoint, response in zip(fantasy_endpoints, responses):
         try:
             print(f"\n   Trying: {endpoint}")
-            response = requests.get(endpoint, timeout=10)
+            if isinstance(response, Exception):
+                raise response
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 print(f"   ✅ Status: {response.status_code} - Found data")
                 
                 # Show keys to understand structure
                 if isinstance(data, dict):
                     print(f"   Keys: {list(data.keys())[:5]}")
                     
-                # Look for Luka specifically
-                data_str = json.dumps(data).lower()
-                if "luka" in data_str and "doncic" in data_str:
+                # Look for Luka specifically - walk the string leaves and stop at the first hit
+                # instead of serializing the whole payload back into one big string
+                found_luka = any('luka' in text and 'doncic' in text
+                                 for text in map(str.lower, _iter_strings(data)))
+                if found_luka:
                     print(f"   🎯 Contains Luka Doncic data!")
                 else:
                     print(f"   📝 No Luka data found")
@@ -67,10 +117,10 @@ def test_espn_team_specific():
     try:
         # Dallas Mavericks team ID is 6
         roster_url = "http://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams/6/roster"
-        response = requests.get(roster_url, timeout=15)
+        response = session.get(roster_url, timeout=15)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"   ✅ Successfully got Dallas roster")
             
             if 'athletes' in data:
@@ -117,22 +167,20 @@ def test_historical_seasons(player_espn_id):
         f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/athletes/{player_espn_id}/gamelog",
     ]
     
-    for endpoint in historical_endpoints:
+    responses = fetch_endpoints(historical_endpoints, timeout=15)
+    
+    for endpoint, response in zip(historical_endpoints, responses):
         try:
             print(f"\n   Trying: {endpoint}")
-            response = requests.get(endpoint, timeout=15)
+            if isinstance(response, Exception):
+                raise response
             
             if response.status_code == 200:
-                data = response.json()
                 print(f"   ✅ Status: {response.status_code}")
                 
-                # Look for seasons/years in the data
-                data_str = json.dumps(data)
-                years_found = []
-                for year in ['2018', '2019', '2020', '2021', '2022', '2023', '2024']:
-                    if year in data_str:
-                        years_found.append(year)
-                        
+                # Look for seasons/years in the raw body with a single regex pass
+                years_found = sorted(set(YEAR_RE.findall(response.text)))
+                
                 if years_found:
                     print(f"   📅 Contains data for years: {', '.join(years_found)}")
                 else:
@@ -25,21 +25,31 @@ class DatabaseCleaner:
     def get_table_count(self, table_name: str) -> int:
         """Get the current record count for a table"""
         try:
-            result = self.client.table(table_name).select('*', count='exact').execute()
+            # Only the count is needed, so skip the row payload entirely
+            key_column = 'player_id' if table_name == 'players' else 'id'
+            result = self.client.table(table_name).select(key_column, count='exact', head=True).execute()
             return result.count
         except Exception as e:
-            logger.error(f"Failed to get count for {table_name}: {e}")
+            logger.error("Failed to get count for %s: %s", table_name, e)
             return 0
     
     def clear_table(self, table_name: str):
         """Clear all data from a specific table"""
+        # Delete server-side in one statement (function defined in database_schema.sql)
+        try:
+            deleted_count = self.client.rpc('bulk_delete', {'tbl': table_name}).execute().data
+            logger.info("Deleted %s records from %s", deleted_count, table_name)
+            return
+        except Exception as e:
+            logger.debug("bulk_delete RPC unavailable for %s, deleting through the REST API: %s", table_name, e)
+        
         try:
             # Get current count
             current_count = self.get_table_count(table_name)
-            logger.info(f"Current {table_name} records: {current_count}")
+            logger.info("Current %s records: %d", table_name, current_count)
             
             if current_count == 0:
-                logger.info(f"Table {table_name} is already empty")
+                logger.info("Table %s is already empty", table_name)
                 return
             
             # Delete all records
@@ -50,14 +60,13 @@ class DatabaseCleaner:
             else:
                 result = self.client.table(table_name).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
             
-            # Verify deletion
-            new_count = self.get_table_count(table_name)
-            deleted_count = current_count - new_count
+            # The delete returns the removed rows, so no second count query is needed
+            deleted_count = len(result.data or [])
             
-            logger.info(f"Deleted {deleted_count} records from {table_name} (remaining: {new_count})")
+            logger.info("Deleted %d records from %s", deleted_count, table_name)
             
         except Exception as e:
-            logger.error(f"Failed to clear table {table_name}: {e}")
+            logger.error("Failed to clear table %s: %s", table_name, e)
     
     def clear_all_stats_tables(self):
         """Clear all stats tables (but preserve players table structure)"""
@@ -84,6 +93,14 @@ class DatabaseCleaner:
         """Clear all data tables"""
         logger.info("Starting complete database cleanup...")
         
+        # Truncate every table in one round trip (function defined in database_schema.sql)
+        try:
+            self.client.rpc('truncate_all_app_tables').execute()
+            logger.info("Database cleanup completed successfully")
+            return
+        except Exception as e:
+            logger.warning("truncate_all_app_tables RPC unavailable, clearing tables individually: %s", e)
+        
         # Clear stats tables first (due to foreign key constraints)
         self.clear_all_stats_tables()
         
@@ -96,10 +113,16 @@ class DatabaseCleaner:
         """Show current status of all tables"""
         tables = ['players', 'per_game_stats', 'per_36_stats', 'total_stats']
         
+        # Fetch all counts in one round trip, falling back to a count query per table
+        try:
+            counts = self.client.rpc('app_table_counts').execute().data
+        except Exception as e:
+            logger.debug("app_table_counts RPC unavailable, counting tables individually: %s", e)
+            counts = {table: self.get_table_count(table) for table in tables}
+        
         logger.info("Current database status:")
         for table in tables:
-            count = self.get_table_count(table)
-            logger.info(f"  {table}: {count} records")
+            logger.info("  %s: %s records", table, counts.get(table, 0))
 
 def main():
     """Main function"""
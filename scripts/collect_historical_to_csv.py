@@ -5,8 +5,13 @@ This avoids database issues and creates permanent historical data files
 
 import os
 import csv
+import gzip
+import shutil
 import logging
-from typing import List, Dict
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import List, Dict, Iterable, Iterator
 from dotenv import load_dotenv
 
 # Add scripts directory to path
@@ -14,50 +19,65 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from nba_api_client import NBAApiClient
-from espn_api_client import ESPNFantasyClient
+from espn_api_client import ESPNFantasyClient, ESPNPositionRecord, normalize_player_name
 from zscore_calculator import ZScoreCalculator
 from config import NBA_API_CONFIG, HISTORICAL_CONFIG
+from csv_output import CSV_WRITE_BUFFER_SIZE, row_values_getter
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Identifying columns kept alongside the zscore_* columns in the z-score CSVs
+ZSCORE_ID_COLUMNS = frozenset(('nba_player_id', 'player_name', 'season'))
+
 class HistoricalCSVCollector:
     def __init__(self):
         """Initialize API clients"""
-        self.nba_client = NBAApiClient()
-        self.espn_client = ESPNFantasyClient()
-        self.zscore_calc = ZScoreCalculator()
-        
         # Create organized directory structure
-        self.base_dir = '/Users/adarsh/RosterGuru/historical_stats'
+        self.base_dir = os.path.abspath(HISTORICAL_CONFIG['output_dir'])
         self.per_game_dir = os.path.join(self.base_dir, 'per_game')
         self.per_36_dir = os.path.join(self.base_dir, 'per_36')
         self.total_dir = os.path.join(self.base_dir, 'total')
         
+        # CSVs are written under stage_dir first and moved into base_dir once a season is complete
+        self.stage_dir = os.path.abspath(HISTORICAL_CONFIG.get('stage_dir') or self.base_dir)
+        
+        # Raw NBA API responses for finished seasons are cached here between runs
+        self.cache_dir = os.path.join(self.base_dir, '.cache')
+        if HISTORICAL_CONFIG.get('refresh_cache') and os.path.isdir(self.cache_dir):
+            logger.info(f"Clearing cached NBA API responses in {self.cache_dir}")
+            shutil.rmtree(self.cache_dir)
+        
+        self.nba_client = NBAApiClient({**NBA_API_CONFIG, 'cache_dir': self.cache_dir})
+        self.espn_client = ESPNFantasyClient()
+        self.zscore_calc = ZScoreCalculator()
+        
         # Ensure all directories exist
-        for directory in [self.per_game_dir, self.per_36_dir, self.total_dir]:
+        for directory in [self.per_game_dir, self.per_36_dir, self.total_dir, self.cache_dir]:
             os.makedirs(directory, exist_ok=True)
+        for directory in [self.per_game_dir, self.per_36_dir, self.total_dir]:
+            os.makedirs(self._stage(directory), exist_ok=True)
         
         # Get ESPN positions once (current rosters)
         logger.info("Fetching current ESPN player positions...")
         espn_players = self.espn_client.get_players_with_positions()
-        # Convert to name -> positions mapping
+        # Convert to name -> positions mapping, pre-joined into the CSV format since
+        # the same rosters are reused for every season
         self.espn_positions = {}
         for player in espn_players:
-            self.espn_positions[player['player_name']] = player['positions']
+            self.espn_positions[player['player_name']] = '|'.join(player['positions'])
         logger.info(f"Retrieved positions for {len(self.espn_positions)} players")
+        
+        # Create normalized name mapping for ESPN data once, it is reused for every season
+        self.normalized_espn_positions = {}
+        for espn_name, positions in self.espn_positions.items():
+            normalized_name = self._normalize_player_name(espn_name)
+            self.normalized_espn_positions[normalized_name] = ESPNPositionRecord(espn_name, positions)
     
     def _normalize_player_name(self, name: str) -> str:
         """Normalize player name for matching (remove accents, lowercase, trim)"""
-        import unicodedata
-        
-        # Remove accents and diacritics
-        normalized = unicodedata.normalize('NFD', name)
-        ascii_name = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
-        
-        # Convert to lowercase and strip whitespace
-        return ascii_name.lower().strip()
+        return normalize_player_name(name)
     
     def _infer_player_position(self, player_name: str, player_data: Dict) -> List[str]:
         """Infer player position using heuristics and known players"""
@@ -111,54 +131,54 @@ class HistoricalCSVCollector:
     
     def enhance_players_with_positions(self, players_data: List[Dict]) -> List[Dict]:
         """Add ESPN positions to player data using normalized name matching"""
-        # Create normalized name mapping for ESPN data
-        normalized_espn_positions = {}
-        for espn_name, positions in self.espn_positions.items():
-            normalized_name = self._normalize_player_name(espn_name)
-            normalized_espn_positions[normalized_name] = {
-                'original_name': espn_name,
-                'positions': positions
-            }
+        return list(self.iter_players_with_positions(players_data))
+    
+    def iter_players_with_positions(self, players_data: Iterable[Dict]) -> Iterator[Dict]:
+        """Lazily yield player data with ESPN positions (set in place), so rows can be written as they are produced"""
+        normalized_espn_positions = self.normalized_espn_positions
         
-        enhanced_players = []
         for player in players_data:
-            enhanced_player = player.copy()
+            # Positions are added in place - callers don't reuse the raw player rows
+            enhanced_player = player
             player_name = player['player_name']
             normalized_player_name = self._normalize_player_name(player_name)
             
             # Try exact match first
             if player_name in self.espn_positions:
-                enhanced_player['position'] = '|'.join(self.espn_positions[player_name])
+                enhanced_player['position'] = self.espn_positions[player_name]
                 logger.debug(f"Found exact ESPN match for {player_name}: {self.espn_positions[player_name]}")
             # Try normalized match
             elif normalized_player_name in normalized_espn_positions:
                 match_data = normalized_espn_positions[normalized_player_name]
-                enhanced_player['position'] = '|'.join(match_data['positions'])
-                logger.debug(f"Found normalized ESPN match for {player_name} -> {match_data['original_name']}: {match_data['positions']}")
+                enhanced_player['position'] = match_data.positions
+                logger.debug(f"Found normalized ESPN match for {player_name} -> {match_data.original_name}: {match_data.positions}")
             else:
                 # Use intelligent position inference as fallback
                 inferred_positions = self._infer_player_position(player_name, enhanced_player)
                 enhanced_player['position'] = '|'.join(inferred_positions)
                 logger.debug(f"No ESPN match found for {player_name}, inferred: {inferred_positions}")
             
-            enhanced_players.append(enhanced_player)
-        
-        return enhanced_players
+            yield enhanced_player
     
     def add_overall_ranking(self, stats_with_zscores: List[Dict]) -> List[Dict]:
         """Add overall ranking based on zscore_total"""
         if not stats_with_zscores:
             return stats_with_zscores
         
-        # Sort players by zscore_total in descending order (higher z-score = better rank)
-        sorted_stats = sorted(stats_with_zscores, key=lambda x: x.get('zscore_total', 0), reverse=True)
+        # Rank by zscore_total in descending order (higher z-score = better rank); a stable
+        # argsort keeps ties in input order, the same as a stable descending sort
+        zscores = np.fromiter((p.get('zscore_total', 0) for p in stats_with_zscores),
+                              dtype=np.float64, count=len(stats_with_zscores))
+        order = np.argsort(-zscores, kind='stable')
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(1, len(order) + 1)
         
         # Add rank (1-based)
-        for rank, player_stats in enumerate(sorted_stats, 1):
+        for player_stats, rank in zip(stats_with_zscores, ranks.tolist()):
             player_stats['overall_rank'] = rank
         
         # Return in original order (by nba_player_id for consistency)
-        return sorted(sorted_stats, key=lambda x: x.get('nba_player_id', 0))
+        return sorted(stats_with_zscores, key=lambda x: x.get('nba_player_id', 0))
     
     def add_per_game_ranking_to_total(self, total_stats: List[Dict], per_game_with_ranks: List[Dict]) -> List[Dict]:
         """Copy overall_rank from per-game stats to total stats for matching players"""
@@ -166,14 +186,12 @@ class HistoricalCSVCollector:
             return total_stats
         
         # Create a mapping from nba_player_id to overall_rank from per-game stats
-        rank_mapping = {}
-        for per_game_player in per_game_with_ranks:
-            rank_mapping[per_game_player['nba_player_id']] = per_game_player.get('overall_rank', None)
+        rank_mapping = {p['nba_player_id']: p.get('overall_rank') for p in per_game_with_ranks}
         
         # Add overall_rank to total stats based on per-game ranking
+        get_rank = rank_mapping.get
         for total_player in total_stats:
-            player_id = total_player['nba_player_id']
-            total_player['overall_rank'] = rank_mapping.get(player_id, None)
+            total_player['overall_rank'] = get_rank(total_player['nba_player_id'])
         
         return total_stats
     
@@ -186,8 +204,8 @@ class HistoricalCSVCollector:
             players_data = self.nba_client.get_players_list(season)
             logger.info(f"Retrieved {len(players_data)} players")
             
-            # Enhance with ESPN positions
-            enhanced_players = self.enhance_players_with_positions(players_data)
+            # Enhance with ESPN positions (lazily - the players are only written out once)
+            enhanced_players = self.iter_players_with_positions(players_data)
             
             # Get stats data
             per_game_stats = self.nba_client.get_player_stats(season)
@@ -195,7 +213,7 @@ class HistoricalCSVCollector:
             total_stats = self.nba_client.get_total_stats(season, apply_filters=False)
             
             # Filter stats to only qualified players (based on per-game stats)
-            qualified_player_ids = set(p['nba_player_id'] for p in per_game_stats)
+            qualified_player_ids = frozenset(s['nba_player_id'] for s in per_game_stats)
             per_36_stats = [s for s in per_36_stats if s['nba_player_id'] in qualified_player_ids]
             total_stats = [s for s in total_stats if s['nba_player_id'] in qualified_player_ids]
             
@@ -223,21 +241,76 @@ class HistoricalCSVCollector:
             logger.error(f"Failed to collect data for season {season}: {e}")
             return None
     
-    def save_to_csv(self, data: List[Dict], filename: str, target_dir: str):
-        """Save data to CSV file in the specified directory"""
-        if not data:
+    def _output_path(self, target_dir: str, filename: str) -> str:
+        """Path a CSV is written to, with a .gz suffix when compression is enabled"""
+        filepath = os.path.join(target_dir, filename)
+        return filepath + '.gz' if HISTORICAL_CONFIG.get('compress') else filepath
+    
+    def _open_output(self, filepath: str):
+        """Open a CSV for writing, gzipped (fast level 1) if the path ends in .gz"""
+        if filepath.endswith('.gz'):
+            return gzip.open(filepath, 'wt', newline='', encoding='utf-8', compresslevel=1)
+        # 1 MiB buffer so the many small row writes reach the OS in large chunks
+        return open(filepath, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE)
+    
+    def save_to_csv(self, data: Iterable[Dict], filename: str, target_dir: str, fieldnames: List[str] = None) -> int:
+        """
+        Stream rows to a CSV file in the specified directory (optionally only the given columns).
+        Unlike csv.DictWriter, every row must contain all of the columns (a missing one raises
+        KeyError) and keys outside the columns are ignored rather than rejected.
+        """
+        rows = iter(data)
+        first_row = next(rows, None)
+        if first_row is None:
             logger.warning(f"No data to save for {filename}")
-            return
+            return 0
         
-        filepath = os.path.join(target_dir, filename)
+        filepath = self._output_path(target_dir, filename)
+        keys = tuple(fieldnames or first_row.keys())
+        
+        get_values = row_values_getter(keys)
         
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = data[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        saved_count = 0
+        with self._open_output(filepath) as csvfile:
+            # Plain csv.writer avoids DictWriter's per-row field validation and lookups;
+            # LF row endings (the csv module's default is CRLF) - every CSV reader accepts them
+            writer = csv.writer(csvfile, lineterminator='\n')
+            writer.writerow(keys)
+            for row in chain((first_row,), rows):
+                writer.writerow(get_values(row))
+                saved_count += 1
         
-        logger.info(f"Saved {len(data)} records to {filepath}")
+        logger.info(f"Saved {saved_count} records to {filepath}")
+        return saved_count
+    
+    def _zscore_fields(self, row: Dict) -> tuple:
+        """Columns written to the z-score CSVs, in the order they appear in the stats rows"""
+        return tuple(k for k in row if k.startswith('zscore_') or k in ZSCORE_ID_COLUMNS)
+    
+    def _link_or_copy(self, source_path: str, target_path: str):
+        """Hardlink an already written CSV to another directory, copying if linking isn't possible"""
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+        try:
+            os.link(source_path, target_path)
+        except OSError:
+            shutil.copyfile(source_path, target_path)
+        logger.info(f"Linked {source_path} to {target_path}")
+    
+    def _stage(self, target_dir: str) -> str:
+        """Staging counterpart of an output directory"""
+        return os.path.join(self.stage_dir, os.path.relpath(target_dir, self.base_dir))
+    
+    def _publish(self, stage_path: str, final_path: str):
+        """Atomically move a staged CSV into the output directory"""
+        try:
+            os.replace(stage_path, final_path)
+        except OSError:
+            # Staging is on another filesystem - copy next to the target, then rename into place
+            temp_path = final_path + '.tmp'
+            shutil.copyfile(stage_path, temp_path)
+            os.replace(temp_path, final_path)
+            os.remove(stage_path)
     
     def collect_and_save_season(self, season: str):
         """Collect and save all data for a season"""
@@ -250,25 +323,41 @@ class HistoricalCSVCollector:
         
         # Save each data type to CSV in organized subdirectories
         season_file = season.replace('-', '_')
+        outputs = []
+        
+        def save(rows, filename, target_dir, fieldnames=None):
+            if self.save_to_csv(rows, filename, self._stage(target_dir), fieldnames):
+                outputs.append((filename, target_dir))
+                return True
+            return False
         
-        # Save players data to all directories (needed for joins)
-        self.save_to_csv(data['players'], f'players_{season_file}.csv', self.per_game_dir)
-        self.save_to_csv(data['players'], f'players_{season_file}.csv', self.per_36_dir)
-        self.save_to_csv(data['players'], f'players_{season_file}.csv', self.total_dir)
+        # Save players data to all directories (needed for joins) - serialize it once and link the other copies
+        players_filename = f'players_{season_file}.csv'
+        if save(data['players'], players_filename, self.per_game_dir):
+            players_path = self._output_path(self._stage(self.per_game_dir), players_filename)
+            for target_dir in (self.per_36_dir, self.total_dir):
+                self._link_or_copy(players_path, self._output_path(self._stage(target_dir), players_filename))
+                outputs.append((players_filename, target_dir))
         
         # Save stats to appropriate subdirectories
-        self.save_to_csv(data['per_game_stats'], f'per_game_stats_{season_file}.csv', self.per_game_dir)
-        self.save_to_csv(data['per_36_stats'], f'per_36_stats_{season_file}.csv', self.per_36_dir)
-        self.save_to_csv(data['total_stats'], f'total_stats_{season_file}.csv', self.total_dir)
+        save(data['per_game_stats'], f'per_game_stats_{season_file}.csv', self.per_game_dir)
+        save(data['per_36_stats'], f'per_36_stats_{season_file}.csv', self.per_36_dir)
+        save(data['total_stats'], f'total_stats_{season_file}.csv', self.total_dir)
         
-        # Also save z-score files to appropriate directories
+        # Also save z-score files to appropriate directories (column subset computed once, not per row)
         if data['per_game_stats']:
-            zscore_per_game = [{k: v for k, v in row.items() if k.startswith('zscore_') or k in ['nba_player_id', 'player_name', 'season']} for row in data['per_game_stats']]
-            self.save_to_csv(zscore_per_game, f'zscores_per_game_{season_file}.csv', self.per_game_dir)
+            save(data['per_game_stats'], f'zscores_per_game_{season_file}.csv', self.per_game_dir,
+                 self._zscore_fields(data['per_game_stats'][0]))
         
         if data['per_36_stats']:
-            zscore_per_36 = [{k: v for k, v in row.items() if k.startswith('zscore_') or k in ['nba_player_id', 'player_name', 'season']} for row in data['per_36_stats']]
-            self.save_to_csv(zscore_per_36, f'zscores_per_36_{season_file}.csv', self.per_36_dir)
+            save(data['per_36_stats'], f'zscores_per_36_{season_file}.csv', self.per_36_dir,
+                 self._zscore_fields(data['per_36_stats'][0]))
+        
+        # Publish the season's files from the staging directory
+        if self.stage_dir != self.base_dir:
+            for filename, target_dir in outputs:
+                self._publish(self._output_path(self._stage(target_dir), filename),
+                              self._output_path(target_dir, filename))
             
         logger.info(f"Completed processing season {season}")
     
@@ -277,12 +366,17 @@ class HistoricalCSVCollector:
         seasons = HISTORICAL_CONFIG['seasons_to_collect']
         logger.info(f"Collecting data for {len(seasons)} seasons: {seasons}")
         
-        for season in seasons:
+        def process_season(season):
             try:
                 self.collect_and_save_season(season)
             except Exception as e:
                 logger.error(f"Failed to process season {season}: {e}")
-                continue
+        
+        # Seasons are independent, so overlap their processing and CSV writing; the shared
+        # NBA client still keeps at most max_concurrent_requests requests open at a time,
+        # spaced by rate_limit_delay
+        with ThreadPoolExecutor(max_workers=HISTORICAL_CONFIG['max_parallel_seasons']) as executor:
+            list(executor.map(process_season, seasons))
         
         logger.info("Historical data collection completed")
 
@@ -14,6 +14,16 @@ NBA_API_CONFIG = {
     "season_type": "Regular Season",  # Regular Season, Playoffs, All Star
     "timeout": 30,  # API request timeout in seconds (increased for historical data)
     "rate_limit_delay": 0.5,  # Delay between API calls to avoid rate limiting (increased)
+    "max_concurrent_requests": 1,  # Requests allowed in flight at once, even when seasons run in parallel
+    "cache_dir": None,  # Directory for raw responses of finished seasons (None disables the cache)
+}
+
+# ESPN API Configuration
+ESPN_API_CONFIG = {
+    "timeout": 30,  # API request timeout in seconds
+    "max_workers": 8,  # Concurrent team roster requests
+    "cache_name": os.path.join(os.path.dirname(__file__), 'espn_cache'),  # SQLite response cache
+    "cache_expire_after": 86400,  # Seconds to reuse cached ESPN responses (None disables caching)
 }
 
 # Player filtering criteria
@@ -54,6 +64,7 @@ ZSCORE_CONFIG = {
 DATABASE_CONFIG = {
     "supabase_url": os.getenv("NEXT_PUBLIC_SUPABASE_URL"),
     "supabase_key": os.getenv("NEXT_PUBLIC_SUPABASE_SERVICE_KEY"),  # Use SERVICE_KEY for full database permissions
+    "batch_size": 200,  # Maximum rows sent in a single upsert request
 }
 
 # Historical data configuration
@@ -64,6 +75,13 @@ HISTORICAL_CONFIG = {
     ],
     "update_current_season": True,  # Whether to update current season data
     "batch_size": 200,  # Number of players to process in each batch
+    "max_parallel_seasons": 4,  # Seasons collected concurrently (requests still share the NBA API rate limit)
+    "refresh_cache": False,  # Discard cached NBA API responses (output_dir/.cache) before collecting
+    "compress": False,  # Write historical CSVs as .csv.gz (import_from_csv.py reads either form)
+    # Where historical CSVs are published, and an optional staging directory (e.g. a tmpfs)
+    # that each season is written to first and then moved into output_dir
+    "output_dir": os.getenv("HISTORICAL_STATS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'historical_stats')),
+    "stage_dir": os.getenv("HISTORICAL_STAGE_DIR"),
 }
 
 # Logging configuration
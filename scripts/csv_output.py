@@ -4,13 +4,32 @@ CSV output module for NBA stats data
 
 import os
 import csv
-import pandas as pd
+import math
 import logging
-from typing import Dict, List
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Dict, List, Sequence, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Write buffer for CSV output files, shared by every script that writes CSVs
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+def row_values_getter(columns: Sequence[str]) -> Callable[[Dict], Tuple]:
+    """Return a function that pulls the given columns' values out of a row dict as a tuple"""
+    # itemgetter pulls a row's values in one C call; with a single key it returns a scalar, so wrap it
+    get_values = itemgetter(*columns)
+    if len(columns) == 1:
+        return lambda row: (get_values(row),)
+    return get_values
+
+def _csv_value(value):
+    """Write missing values (None, NaN) as empty fields, as DataFrame.to_csv does"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return value
+
 class CSVOutputManager:
     """Handles CSV file output for NBA stats data"""
     
@@ -23,6 +42,22 @@ class CSVOutputManager:
         os.makedirs(self.base_dir, exist_ok=True)
         logger.info(f"Data directory ensured: {self.base_dir}")
     
+    def _write_dicts(self, filepath: str, rows: List[Dict], extra: Dict = None):
+        """Write row dicts to CSV through a large write buffer, setting the extra columns on every row"""
+        extra = extra or {}
+        # Header is every key in order of first appearance (as a DataFrame would build it) plus new extra columns
+        columns = list(dict.fromkeys(chain((k for row in rows for k in row), extra)))
+        overrides = [(i, extra[column]) for i, column in enumerate(columns) if column in extra]
+        
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(columns)
+            for row in rows:
+                values = [_csv_value(row.get(column)) for column in columns]
+                for i, value in overrides:
+                    values[i] = value
+                writer.writerow(values)
+    
     def save_players_csv(self, players_data: List[Dict], season: str):
         """Save players data to CSV"""
         if not players_data:
@@ -33,8 +68,7 @@ class CSVOutputManager:
         filepath = os.path.join(self.base_dir, filename)
         
         try:
-            df = pd.DataFrame(players_data)
-            df.to_csv(filepath, index=False)
+            self._write_dicts(filepath, players_data)
             logger.info(f"Saved {len(players_data)} players to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save players CSV: {e}")
@@ -50,10 +84,8 @@ class CSVOutputManager:
         filepath = os.path.join(self.base_dir, filename)
         
         try:
-            df = pd.DataFrame(stats_data)
             # Add season column
-            df['season'] = season
-            df.to_csv(filepath, index=False)
+            self._write_dicts(filepath, stats_data, extra={'season': season})
             logger.info(f"Saved {len(stats_data)} per-game stats to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save per-game stats CSV: {e}")
@@ -69,10 +101,8 @@ class CSVOutputManager:
         filepath = os.path.join(self.base_dir, filename)
         
         try:
-            df = pd.DataFrame(stats_data)
             # Add season column
-            df['season'] = season
-            df.to_csv(filepath, index=False)
+            self._write_dicts(filepath, stats_data, extra={'season': season})
             logger.info(f"Saved {len(stats_data)} per-36 stats to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save per-36 stats CSV: {e}")
@@ -88,10 +118,8 @@ class CSVOutputManager:
         filepath = os.path.join(self.base_dir, filename)
         
         try:
-            df = pd.DataFrame(stats_data)
             # Add season column
-            df['season'] = season
-            df.to_csv(filepath, index=False)
+            self._write_dicts(filepath, stats_data, extra={'season': season})
             logger.info(f"Saved {len(stats_data)} total stats to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save total stats CSV: {e}")
@@ -107,8 +135,7 @@ class CSVOutputManager:
         filepath = os.path.join(self.base_dir, filename)
         
         try:
-            df = pd.DataFrame(zscores_data)
-            df.to_csv(filepath, index=False)
+            self._write_dicts(filepath, zscores_data)
             logger.info(f"Saved {len(zscores_data)} z-scores ({stat_type}) to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save z-scores CSV: {e}")
@@ -138,8 +165,8 @@ class CSVOutputManager:
     def list_output_files(self) -> List[str]:
         """List all CSV files in the output directory"""
         try:
-            files = [f for f in os.listdir(self.base_dir) if f.endswith('.csv')]
-            return sorted(files)
+            with os.scandir(self.base_dir) as entries:
+                return sorted(entry.name for entry in entries if entry.name.endswith('.csv') and entry.is_file())
         except Exception as e:
             logger.error(f"Failed to list output files: {e}")
             return []
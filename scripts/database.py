@@ -4,11 +4,21 @@ Database connection and operations for NBA stats collection
 
 from supabase import create_client, Client
 import logging
+from itertools import islice
 from typing import Dict, List, Optional, Any
 from config import DATABASE_CONFIG
 
 logger = logging.getLogger(__name__)
 
+def chunks(rows: List[Dict], size: int):
+    """Yield successive lists of at most size rows"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 class DatabaseManager:
     """Handles all database operations for NBA stats using Supabase"""
     
@@ -33,6 +43,14 @@ class DatabaseManager:
     
     def clear_all_stats_data(self):
         """Clear all stats data from database tables for full collection"""
+        # Truncate all stats tables in one statement (function defined in database_schema.sql)
+        try:
+            self.get_client().rpc('truncate_stats').execute()
+            logger.info("Successfully cleared all stats data from database")
+            return
+        except Exception as e:
+            logger.warning(f"truncate_stats RPC unavailable, deleting stats rows per table: {e}")
+        
         try:
             tables_to_clear = ['per_game_stats', 'per_36_stats', 'total_stats']
             
@@ -65,20 +83,21 @@ class DatabaseManager:
         logger.warning("Please run the SQL schema through Supabase dashboard SQL editor.")
         logger.info(f"Schema file location: {schema_file}")
     
+    def _upsert(self, table_name: str, data: Any, on_conflict: str, client: Client = None) -> List[Dict]:
+        """Upsert one row (or a list of rows) in a single request, returning the response rows"""
+        client = client or self.get_client()
+        result = client.table(table_name).upsert(data, on_conflict=on_conflict).execute()
+        return result.data or []
+    
     def upsert_player(self, player_data: Dict) -> int:
         """Insert or update player information"""
         try:
-            client = self.get_client()
-            
             # Try to upsert the player
-            result = client.table('players').upsert(
-                player_data,
-                on_conflict='player_id'
-            ).execute()
-            
-            if result.data:
-                player_id = result.data[0]['player_id']
-                logger.info(f"Player {player_data['player_name']} upserted successfully")
+            upserted = self._upsert('players', player_data, 'player_id')
+            
+            if upserted:
+                player_id = upserted[0]['player_id']
+                logger.debug("Player %s upserted successfully", player_data['player_name'])
                 return player_id
             else:
                 return player_data['player_id']
@@ -90,14 +109,9 @@ class DatabaseManager:
     def upsert_per_game_stats(self, stats_data: Dict):
         """Insert or update per-game statistics"""
         try:
-            client = self.get_client()
+            self._upsert('per_game_stats', stats_data, 'player_id,season')
             
-            result = client.table('per_game_stats').upsert(
-                stats_data,
-                on_conflict='player_id,season'
-            ).execute()
-            
-            logger.info(f"Per-game stats upserted for player {stats_data.get('player_id')} season {stats_data.get('season')}")
+            logger.debug("Per-game stats upserted for player %s season %s", stats_data.get('player_id'), stats_data.get('season'))
             
         except Exception as e:
             logger.error(f"Failed to upsert per-game stats: {e}")
@@ -106,14 +120,9 @@ class DatabaseManager:
     def upsert_per_36_stats(self, stats_data: Dict):
         """Insert or update per-36 minute statistics"""
         try:
-            client = self.get_client()
+            self._upsert('per_36_stats', stats_data, 'player_id,season')
             
-            result = client.table('per_36_stats').upsert(
-                stats_data,
-                on_conflict='player_id,season'
-            ).execute()
-            
-            logger.info(f"Per-36 stats upserted for player {stats_data.get('player_id')} season {stats_data.get('season')}")
+            logger.debug("Per-36 stats upserted for player %s season %s", stats_data.get('player_id'), stats_data.get('season'))
             
         except Exception as e:
             logger.error(f"Failed to upsert per-36 stats: {e}")
@@ -122,31 +131,29 @@ class DatabaseManager:
     def upsert_total_stats(self, stats_data: Dict):
         """Insert or update total season statistics"""
         try:
-            client = self.get_client()
-            
-            result = client.table('total_stats').upsert(
-                stats_data,
-                on_conflict='player_id,season'
-            ).execute()
+            self._upsert('total_stats', stats_data, 'player_id,season')
             
-            logger.info(f"Total stats upserted for player {stats_data.get('player_id')} season {stats_data.get('season')}")
+            logger.debug("Total stats upserted for player %s season %s", stats_data.get('player_id'), stats_data.get('season'))
             
         except Exception as e:
             logger.error(f"Failed to upsert total stats: {e}")
             raise
     
+    def _batch_upsert(self, table_name: str, rows: List[Dict], on_conflict: str) -> List[Dict]:
+        """Upsert rows in batch_size chunks over the same client, returning the combined response rows"""
+        client = self.get_client()
+        upserted = []
+        for chunk in chunks(rows, self.config.get('batch_size', 200)):
+            upserted.extend(self._upsert(table_name, chunk, on_conflict, client))
+        return upserted
+    
     def batch_upsert_players(self, players_data: List[Dict]):
         """Batch upsert multiple players for better performance"""
         try:
-            client = self.get_client()
-            
-            result = client.table('players').upsert(
-                players_data,
-                on_conflict='nba_player_id'
-            ).execute()
+            upserted = self._batch_upsert('players', players_data, 'nba_player_id')
             
             logger.info(f"Batch upserted {len(players_data)} players")
-            return result.data
+            return upserted
             
         except Exception as e:
             logger.error(f"Failed to batch upsert players: {e}")
@@ -155,15 +162,10 @@ class DatabaseManager:
     def batch_upsert_per_game_stats(self, stats_data: List[Dict]):
         """Batch upsert multiple per-game stats for better performance"""
         try:
-            client = self.get_client()
-            
-            result = client.table('per_game_stats').upsert(
-                stats_data,
-                on_conflict='player_id,season'
-            ).execute()
+            upserted = self._batch_upsert('per_game_stats', stats_data, 'player_id,season')
             
             logger.info(f"Batch upserted {len(stats_data)} per-game stats records")
-            return result.data
+            return upserted
             
         except Exception as e:
             logger.error(f"Failed to batch upsert per-game stats: {e}")
@@ -172,15 +174,10 @@ class DatabaseManager:
     def batch_upsert_per_36_stats(self, stats_data: List[Dict]):
         """Batch upsert multiple per-36 stats for better performance"""
         try:
-            client = self.get_client()
-            
-            result = client.table('per_36_stats').upsert(
-                stats_data,
-                on_conflict='player_id,season'
-            ).execute()
+            upserted = self._batch_upsert('per_36_stats', stats_data, 'player_id,season')
             
             logger.info(f"Batch upserted {len(stats_data)} per-36 stats records")
-            return result.data
+            return upserted
             
         except Exception as e:
             logger.error(f"Failed to batch upsert per-36 stats: {e}")
@@ -189,15 +186,10 @@ class DatabaseManager:
     def batch_upsert_total_stats(self, stats_data: List[Dict]):
         """Batch upsert multiple total stats for better performance"""
         try:
-            client = self.get_client()
-            
-            result = client.table('total_stats').upsert(
-                stats_data,
-                on_conflict='player_id,season'
-            ).execute()
+            upserted = self._batch_upsert('total_stats', stats_data, 'player_id,season')
             
             logger.info(f"Batch upserted {len(stats_data)} total stats records")
-            return result.data
+            return upserted
             
         except Exception as e:
             logger.error(f"Failed to batch upsert total stats: {e}")
@@ -224,7 +224,12 @@ CREATE POLICY "Allow full access to per_36_stats" ON per_36_stats
 CREATE POLICY "Allow full access to total_stats" ON total_stats
     FOR ALL USING (true) WITH CHECK (true);
 
-CREATE INDEX IF NOT EXISTS idx_players_nba_id ON players(nba_player_id);
+-- Covering index for the nba_player_id -> player_id lookups (importer paging, ID mapping),
+-- so they can be answered with index-only scans; the UNIQUE constraint already indexes the key itself
+CREATE INDEX IF NOT EXISTS idx_players_nba_id_player_id ON players(nba_player_id) INCLUDE (player_id);
+-- Superseded by the covering index above; drop them from databases created with older schemas
+DROP INDEX IF EXISTS idx_players_nba_id;
+DROP INDEX IF EXISTS idx_players_nba_id_covering;
 CREATE INDEX IF NOT EXISTS idx_players_active ON players(is_active);
 
 -- Update trigger for updated_at timestamps
@@ -247,3 +252,64 @@ CREATE TRIGGER update_per_36_stats_updated_at BEFORE UPDATE ON per_36_stats
 
 CREATE TRIGGER update_total_stats_updated_at BEFORE UPDATE ON total_stats
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Maintenance helpers called via RPC from clear_database.py
+-- The destructive helpers run with the caller's privileges and are only executable by service_role
+-- (see the REVOKE/GRANT below), so the publishable anon key can't wipe the tables
+-- TRUNCATE drops every row in one statement instead of scanning and logging each deleted row
+CREATE OR REPLACE FUNCTION truncate_all_app_tables()
+RETURNS void
+LANGUAGE sql
+SET search_path = public
+AS $$
+    TRUNCATE players, per_game_stats, per_36_stats, total_stats RESTART IDENTITY CASCADE;
+$$;
+
+-- Record counts for all app tables in a single round trip
+CREATE OR REPLACE FUNCTION app_table_counts()
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'players', (SELECT count(*) FROM players),
+        'per_game_stats', (SELECT count(*) FROM per_game_stats),
+        'per_36_stats', (SELECT count(*) FROM per_36_stats),
+        'total_stats', (SELECT count(*) FROM total_stats)
+    );
+$$;
+
+-- Delete every row from one app table in a single statement, returning the number of rows removed
+CREATE OR REPLACE FUNCTION bulk_delete(tbl text)
+RETURNS bigint
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+    n bigint;
+BEGIN
+    IF tbl NOT IN ('players', 'per_game_stats', 'per_36_stats', 'total_stats') THEN
+        RAISE EXCEPTION 'bulk_delete: unsupported table %', tbl;
+    END IF;
+    EXECUTE format('DELETE FROM %I', tbl);
+    GET DIAGNOSTICS n = ROW_COUNT;
+    RETURN n;
+END;
+$$;
+
+-- Empty only the stats tables (players are kept) before a full stats collection
+CREATE OR REPLACE FUNCTION truncate_stats()
+RETURNS void
+LANGUAGE sql
+SET search_path = public
+AS $$
+    TRUNCATE per_game_stats, per_36_stats, total_stats RESTART IDENTITY;
+$$;
+
+-- Functions are executable by PUBLIC by default; restrict the destructive helpers to the service key
+REVOKE EXECUTE ON FUNCTION truncate_all_app_tables() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION bulk_delete(text) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION truncate_stats() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION truncate_all_app_tables() TO service_role;
+GRANT EXECUTE ON FUNCTION bulk_delete(text) TO service_role;
+GRANT EXECUTE ON FUNCTION truncate_stats() TO service_role;
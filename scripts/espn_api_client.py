@@ -4,21 +4,102 @@ Handles fetching player positions from ESPN's Fantasy v3 API
 """
 
 import logging
+import orjson
+import unicodedata
+from collections import namedtuple
+import requests
+import requests_cache
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Optional
 from espn_api.basketball import League
+from config import ESPN_API_CONFIG
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ESPN's NBA franchise IDs are fixed (1 = ATL ... 30 = CHA)
+ESPN_NBA_TEAM_IDS = range(1, 31)
+
+# ESPN position abbreviations/names -> fantasy positions (tuples so the shared values can't be mutated
+# and can be handed to player records as-is)
+POSITION_MAPPING = {
+    'PG': ('PG',),
+    'SG': ('SG',),
+    'G': ('PG', 'SG'),  # Generic Guard
+    'SF': ('SF',),
+    'PF': ('PF',),
+    'F': ('SF', 'PF'),  # Generic Forward
+    'C': ('C',),
+    'F-C': ('PF', 'C'),
+    'G-F': ('SG', 'SF'),
+    'C-F': ('C', 'PF'),
+    # Additional mappings
+    'Point Guard': ('PG',),
+    'Shooting Guard': ('SG',),
+    'Small Forward': ('SF',),
+    'Power Forward': ('PF',),
+    'Center': ('C',),
+    'Forward': ('SF', 'PF'),
+    'Guard': ('PG', 'SG')
+}
+
+# Same mapping keyed case-insensitively, for the position-name fallback lookup
+POSITION_MAPPING_LOWER = {name.lower(): positions for name, positions in POSITION_MAPPING.items()}
+
+@lru_cache(maxsize=8192)
+def normalize_player_name(name: str) -> str:
+    """Normalize player name for matching ESPN and NBA names (remove accents, lowercase, trim)"""
+    # Plain ASCII names have no diacritics, so skip the NFD decomposition
+    if name.isascii():
+        return name.lower().strip()
+    
+    # Remove accents and diacritics
+    normalized = unicodedata.normalize('NFD', name)
+    ascii_name = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
+    
+    # Convert to lowercase and strip whitespace
+    return ascii_name.lower().strip()
+
+# Record for ESPN positions keyed by normalized player name
+ESPNPositionRecord = namedtuple('ESPNPositionRecord', ['original_name', 'positions'])
+
 class ESPNFantasyClient:
     """Client for ESPN Fantasy Basketball API"""
     
-    def __init__(self):
+    def __init__(self, config: Dict = None):
         """Initialize ESPN Fantasy client"""
+        self.config = config or ESPN_API_CONFIG
         # We'll use a public league approach or fallback method
         self.league = None
         self.current_year = 2025  # Current NBA season
+        # Team ID -> abbreviation map, fetched once per client (roster workers share it)
+        self._team_map: Optional[Dict[int, str]] = None
+        self._team_map_lock = threading.Lock()
+        # Shared session so concurrent roster fetches reuse keep-alive connections;
+        # responses are cached on disk so re-runs don't re-download every roster
+        if self.config.get('cache_expire_after'):
+            self.session = requests_cache.CachedSession(
+                self.config['cache_name'],
+                backend='sqlite',
+                expire_after=self.config['cache_expire_after'],
+                allowable_codes=(200,)
+            )
+        else:
+            self.session = requests.Session()
+        
+        # Size the connection pool to the roster fan-out and retry transient ESPN failures with backoff
+        adapter = HTTPAdapter(
+            pool_connections=self.config['max_workers'],
+            pool_maxsize=self.config['max_workers'],
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
     def _make_request(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict:
         """Make HTTP request to ESPN API"""
@@ -26,15 +107,15 @@ class ESPNFantasyClient:
             if headers:
                 self.session.headers.update(headers)
                 
-            response = self.session.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=self.config['timeout'])
             response.raise_for_status()
             
-            return response.json()
+            return orjson.loads(response.content)
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {e}")
             raise
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response: {e}")
             raise
     
@@ -65,119 +146,13 @@ class ESPNFantasyClient:
         Fallback method using ESPN's public API but with improved position mapping
         """
         try:
-            import requests
-            import json
-            
-            # Get all NBA teams first
-            teams_url = "http://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams"
-            response = requests.get(teams_url, timeout=30)
-            response.raise_for_status()
-            teams_data = response.json()
-            
             all_players = []
             
-            # Extract teams from the response structure
-            if 'sports' in teams_data and teams_data['sports']:
-                leagues = teams_data['sports'][0].get('leagues', [])
-                if leagues:
-                    teams = leagues[0].get('teams', [])
-                    
-                    logger.info(f"Found {len(teams)} NBA teams")
-                    
-                    for team_info in teams:
-                        team = team_info.get('team', {})
-                        team_abbrev = team.get('abbreviation', '')
-                        team_id = team.get('id')
-                        
-                        if not team_id:
-                            continue
-                            
-                        # Get team roster using the correct endpoint format
-                        roster_url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{team_id}/roster"
-                        
-                        try:
-                            logger.info(f"Fetching roster for {team_abbrev} (ID: {team_id})")
-                            roster_response = requests.get(roster_url, timeout=30)
-                            roster_response.raise_for_status()
-                            roster_data = roster_response.json()
-                            
-                            # Process roster data - athletes are individual objects, not grouped
-                            if 'athletes' in roster_data:
-                                for athlete in roster_data['athletes']:
-                                    # Extract player information
-                                    player_info = {
-                                        'espn_player_id': athlete.get('id'),
-                                        'player_name': athlete.get('displayName', ''),
-                                        'first_name': athlete.get('firstName', ''),
-                                        'last_name': athlete.get('lastName', ''),
-                                        'team_abbreviation': team_abbrev,
-                                        'positions': [],
-                                        'is_active': athlete.get('active', True),
-                                        'injury_status': athlete.get('status', {}).get('type', 'ACTIVE')
-                                    }
-                                    
-                                    # Get position information with improved mapping
-                                    position_info = athlete.get('position', {})
-                                    if position_info:
-                                        pos_abbrev = position_info.get('abbreviation', '')
-                                        pos_name = position_info.get('name', '').lower()
-                                        
-                                        if pos_abbrev:
-                                            # Enhanced position mapping
-                                            position_mapping = {
-                                                'PG': ['PG'],
-                                                'SG': ['SG'], 
-                                                'G': ['PG', 'SG'],  # Generic Guard
-                                                'SF': ['SF'],
-                                                'PF': ['PF'],
-                                                'F': ['SF', 'PF'],  # Generic Forward
-                                                'C': ['C'],
-                                                'F-C': ['PF', 'C'],
-                                                'G-F': ['SG', 'SF'],
-                                                'C-F': ['C', 'PF'],
-                                                # Additional mappings
-                                                'Point Guard': ['PG'],
-                                                'Shooting Guard': ['SG'],
-                                                'Small Forward': ['SF'],
-                                                'Power Forward': ['PF'],
-                                                'Center': ['C'],
-                                                'Forward': ['SF', 'PF'],
-                                                'Guard': ['PG', 'SG']
-                                            }
-                                            
-                                            # Try abbreviation first, then full name
-                                            mapped_positions = position_mapping.get(pos_abbrev) or position_mapping.get(pos_name.title())
-                                            if mapped_positions:
-                                                player_info['positions'] = mapped_positions
-                                            else:
-                                                # More specific position inference
-                                                if 'guard' in pos_name:
-                                                    if 'point' in pos_name:
-                                                        player_info['positions'] = ['PG']
-                                                    elif 'shooting' in pos_name:
-                                                        player_info['positions'] = ['SG']
-                                                    else:
-                                                        player_info['positions'] = ['PG', 'SG']
-                                                elif 'forward' in pos_name:
-                                                    if 'small' in pos_name:
-                                                        player_info['positions'] = ['SF']
-                                                    elif 'power' in pos_name:
-                                                        player_info['positions'] = ['PF']
-                                                    else:
-                                                        player_info['positions'] = ['SF', 'PF']
-                                                elif 'center' in pos_name:
-                                                    player_info['positions'] = ['C']
-                                                else:
-                                                    # Default to most common positions
-                                                    player_info['positions'] = ['SF', 'PF']
-                                    
-                                    # Only include players with valid names and positions
-                                    if player_info['player_name'] and player_info['positions']:
-                                        all_players.append(player_info)
-                                            
-                        except Exception as e:
-                            logger.warning(f"Failed to get roster for team {team_abbrev}: {e}")
-                            continue
+            # Each roster response carries its team metadata, so there's no need for a
+            # separate /teams request - fan the roster requests out over the shared session
+            with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
+                for team_players in executor.map(self._get_team_roster_players, ESPN_NBA_TEAM_IDS):
+                    all_players.extend(team_players)
             
             logger.info(f"Retrieved {len(all_players)} players with positions from ESPN API")
             return all_players
@@ -186,8 +161,94 @@ class ESPNFantasyClient:
             logger.error(f"Failed to get players from ESPN API: {e}")
             return []
     
+    def _get_team_roster_players(self, team_id: int) -> List[Dict]:
+        """Fetch a single team roster and map its athletes to player records"""
+        # Get team roster using the correct endpoint format
+        roster_url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{team_id}/roster"
+        
+        players = []
+        team_abbrev = ''
+        try:
+            logger.debug(f"Fetching roster for team ID {team_id}")
+            roster_data = self._make_request(roster_url)
+            
+            team_abbrev = roster_data.get('team', {}).get('abbreviation', '')
+            if not team_abbrev:
+                # Fall back to the teams endpoint if the roster omits team metadata
+                team_abbrev = self.get_team_abbreviations().get(team_id, '')
+            
+            # Process roster data - athletes are individual objects, not grouped
+            if 'athletes' in roster_data:
+                for athlete in roster_data['athletes']:
+                    # Only include players with valid names and positions - check both
+                    # before building the player record so skipped athletes cost nothing
+                    player_name = athlete.get('displayName', '')
+                    if not player_name:
+                        continue
+                    
+                    # Get position information with improved mapping
+                    position_info = athlete.get('position') or {}
+                    pos_abbrev = position_info.get('abbreviation', '')
+                    if not pos_abbrev:
+                        continue
+                    pos_name = position_info.get('name', '').lower()
+                    
+                    # Try abbreviation first, then full name
+                    mapped_positions = POSITION_MAPPING.get(pos_abbrev) or POSITION_MAPPING_LOWER.get(pos_name)
+                    if mapped_positions:
+                        positions = mapped_positions
+                    else:
+                        # More specific position inference
+                        if 'guard' in pos_name:
+                            if 'point' in pos_name:
+                                positions = ('PG',)
+                            elif 'shooting' in pos_name:
+                                positions = ('SG',)
+                            else:
+                                positions = ('PG', 'SG')
+                        elif 'forward' in pos_name:
+                            if 'small' in pos_name:
+                                positions = ('SF',)
+                            elif 'power' in pos_name:
+                                positions = ('PF',)
+                            else:
+                                positions = ('SF', 'PF')
+                        elif 'center' in pos_name:
+                            positions = ('C',)
+                        else:
+                            # Default to most common positions
+                            positions = ('SF', 'PF')
+                    
+                    # Extract player information
+                    players.append({
+                        'espn_player_id': athlete.get('id'),
+                        'player_name': player_name,
+                        'first_name': athlete.get('firstName', ''),
+                        'last_name': athlete.get('lastName', ''),
+                        'team_abbreviation': team_abbrev,
+                        'positions': positions,
+                        'is_active': athlete.get('active', True),
+                        'injury_status': athlete.get('status', {}).get('type', 'ACTIVE')
+                    })
+                            
+        except Exception as e:
+            logger.warning(f"Failed to get roster for team {team_abbrev or team_id}: {e}")
+        
+        return players
+    
     def get_team_abbreviations(self) -> Dict[int, str]:
-        """Get mapping of ESPN team IDs to abbreviations"""
+        """Get mapping of ESPN team IDs to abbreviations (cached on the client after the first success)"""
+        with self._team_map_lock:
+            if self._team_map is None:
+                team_map = self._fetch_team_abbreviations()
+                if not team_map:
+                    # Don't cache a failed fetch - the next caller retries
+                    return team_map
+                self._team_map = team_map
+            return self._team_map
+    
+    def _fetch_team_abbreviations(self) -> Dict[int, str]:
+        """Fetch the teams endpoint and build the team ID -> abbreviation map"""
         try:
             url = "http://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams"
             data = self._make_request(url)
@@ -5,10 +5,17 @@ Export NBA stats data to CSV files for historical data management
 import os
 import csv
 import logging
-from typing import List, Dict
+from itertools import chain
+from typing import List, Dict, Iterable, Iterator
 from dotenv import load_dotenv
 from supabase import create_client
 
+# Add scripts directory to path
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from csv_output import CSV_WRITE_BUFFER_SIZE, row_values_getter
+
 # Load environment variables
 load_dotenv()
 
@@ -27,28 +34,60 @@ class CSVExporter:
         self.data_dir = 'data'
         os.makedirs(self.data_dir, exist_ok=True)
     
+    def _iter_table_pages(self, table_name: str, key_column: str, filters: Dict = None, page_size: int = 1000) -> Iterator[List[Dict]]:
+        """Yield a table's rows page by page using keyset pagination on key_column"""
+        last_key = None
+        while True:
+            query = self.client.table(table_name).select('*').order(key_column).limit(page_size)
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            if last_key is not None:
+                query = query.gt(key_column, last_key)
+            
+            page = query.execute().data
+            if not page:
+                break
+            
+            yield page
+            last_key = page[-1][key_column]
+    
+    def _write_csv(self, filename: str, pages: Iterable[List[Dict]]) -> int:
+        """Stream pages of rows that share one schema (as Supabase returns them) to CSV, returning the row count"""
+        pages = iter(pages)
+        first_page = next(pages, None)
+        if not first_page:
+            # Nothing to export - don't leave an empty file behind
+            return 0
+        
+        fieldnames = list(first_page[0].keys())
+        get_values = row_values_getter(fieldnames)
+        
+        rows_written = 0
+        with open(filename, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile, lineterminator='\n')
+            writer.writerow(fieldnames)
+            # Each page is written as soon as it arrives, so only one page is held in memory
+            for page in chain((first_page,), pages):
+                writer.writerows(map(get_values, page))
+                rows_written += len(page)
+        
+        return rows_written
+    
     def export_players_to_csv(self, season: str = None):
         """Export players data to CSV"""
         try:
             logger.info("Exporting players data to CSV...")
             
+            filename = f"{self.data_dir}/players.csv"
+            
             # Get all players
-            result = self.client.table('players').select('*').execute()
+            rows_written = self._write_csv(filename, self._iter_table_pages('players', 'player_id'))
             
-            if not result.data:
+            if not rows_written:
                 logger.warning("No players data found")
                 return
             
-            filename = f"{self.data_dir}/players.csv"
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                if result.data:
-                    fieldnames = result.data[0].keys()
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(result.data)
-            
-            logger.info(f"Exported {len(result.data)} players to {filename}")
+            logger.info(f"Exported {rows_written} players to {filename}")
             
         except Exception as e:
             logger.error(f"Failed to export players: {e}")
@@ -58,23 +97,17 @@ class CSVExporter:
         try:
             logger.info(f"Exporting {table_name} data for season {season}...")
             
+            filename = f"{self.data_dir}/{table_name}_{season.replace('-', '_')}.csv"
+            
             # Get stats data for the season
-            result = self.client.table(table_name).select('*').eq('season', season).execute()
+            pages = self._iter_table_pages(table_name, 'id', filters={'season': season})
+            rows_written = self._write_csv(filename, pages)
             
-            if not result.data:
+            if not rows_written:
                 logger.warning(f"No {table_name} data found for season {season}")
                 return
             
-            filename = f"{self.data_dir}/{table_name}_{season.replace('-', '_')}.csv"
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                if result.data:
-                    fieldnames = result.data[0].keys()
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(result.data)
-            
-            logger.info(f"Exported {len(result.data)} {table_name} records to {filename}")
+            logger.info(f"Exported {rows_written} {table_name} records to {filename}")
             
         except Exception as e:
             logger.error(f"Failed to export {table_name} for {season}: {e}")
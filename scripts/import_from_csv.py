@@ -2,13 +2,21 @@
 Import NBA stats data from CSV files to Supabase
 """
 
+import io
 import os
 import csv
+import gzip
 import logging
 from typing import List, Dict
 from dotenv import load_dotenv
 from supabase import create_client
 
+# Add scripts directory to path
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import HISTORICAL_CONFIG
+
 # Load environment variables
 load_dotenv()
 
@@ -22,8 +30,13 @@ class CSVImporter:
         self.supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
         self.supabase_key = os.getenv('NEXT_PUBLIC_SUPABASE_SERVICE_KEY')
         self.client = create_client(self.supabase_url, self.supabase_key)
+        # Optional direct Postgres connection string for COPY-based bulk loads
+        self.db_url = os.getenv('SUPABASE_DB_URL')
+        # nba_player_id -> player_id, loaded once and reused for every stats file
+        self._player_id_mapping = None
         
-        self.data_dir = '../historical_stats'
+        # Read from wherever collect_historical_to_csv.py publishes (HISTORICAL_STATS_DIR)
+        self.data_dir = os.path.abspath(HISTORICAL_CONFIG['output_dir'])
         self.subdirs = {
             'per_game': 'per_game',
             'per_36': 'per_36', 
@@ -38,12 +51,17 @@ class CSVImporter:
             else:
                 filepath = os.path.join(self.data_dir, filename)
             
+            # Fall back to a gzipped copy written with HISTORICAL_CONFIG['compress']
+            if not os.path.exists(filepath) and os.path.exists(filepath + '.gz'):
+                filepath += '.gz'
+            
             if not os.path.exists(filepath):
                 logger.error(f"CSV file not found: {filepath}")
                 return []
             
             data = []
-            with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
+            opener = gzip.open if filepath.endswith('.gz') else open
+            with opener(filepath, 'rt', newline='', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
                 for row in reader:
                     # Convert numeric fields
@@ -66,15 +84,34 @@ class CSVImporter:
             filtered_data.append(filtered_row)
         return filtered_data
     
+    def iter_players(self, columns: str = 'player_id, nba_player_id', page_size: int = 1000):
+        """Yield players page by page using keyset pagination on nba_player_id"""
+        last_nba_player_id = None
+        while True:
+            query = self.client.table('players').select(columns).order('nba_player_id').limit(page_size)
+            if last_nba_player_id is not None:
+                query = query.gt('nba_player_id', last_nba_player_id)
+            
+            page = query.execute().data
+            if not page:
+                break
+            
+            yield from page
+            last_nba_player_id = page[-1]['nba_player_id']
+    
     def get_player_id_mapping(self) -> Dict[str, int]:
         """Get mapping from nba_player_id to player_id from database"""
+        if self._player_id_mapping is not None:
+            return self._player_id_mapping
+        
         try:
-            result = self.client.table('players').select('player_id, nba_player_id').execute()
+            # Page through players so the mapping isn't truncated at the PostgREST row limit
             mapping = {}
-            for player in result.data:
+            for player in self.iter_players():
                 if player['nba_player_id']:
                     mapping[str(player['nba_player_id'])] = player['player_id']
             logger.info(f"Created player ID mapping for {len(mapping)} players")
+            self._player_id_mapping = mapping
             return mapping
         except Exception as e:
             logger.error(f"Failed to create player ID mapping: {e}")
@@ -164,6 +201,51 @@ class CSVImporter:
         
         return converted
     
+    def copy_upsert(self, table_name: str, data: List[Dict], conflict_column: str = None):
+        """Bulk load rows with Postgres COPY into a staging table, then merge them in one statement"""
+        import psycopg2
+        from psycopg2 import sql
+        
+        # Rows may omit optional columns, so take the union in first-seen order
+        columns = list(dict.fromkeys(k for row in data for k in row))
+        
+        # Note: CSV COPY loads an empty field as NULL, so None and '' both arrive as NULL here,
+        # whereas the REST upsert path stores '' as an empty string
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([row.get(col) for col in columns] for row in data)
+        buffer.seek(0)
+        
+        column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+        insert = sql.SQL("INSERT INTO {table} ({columns}) SELECT {columns} FROM _staging").format(
+            table=sql.Identifier(table_name), columns=column_list
+        )
+        if conflict_column:
+            conflict_columns = [col.strip() for col in conflict_column.split(',')]
+            updates = [sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col))
+                       for col in columns if col not in conflict_columns]
+            insert += sql.SQL(" ON CONFLICT ({conflict}) ").format(
+                conflict=sql.SQL(', ').join(map(sql.Identifier, conflict_columns))
+            )
+            if updates:
+                insert += sql.SQL("DO UPDATE SET ") + sql.SQL(', ').join(updates)
+            else:
+                insert += sql.SQL("DO NOTHING")
+        
+        with psycopg2.connect(self.db_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("CREATE TEMP TABLE _staging (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP").format(
+                    table=sql.Identifier(table_name)
+                ))
+                cur.copy_expert(
+                    sql.SQL("COPY _staging ({columns}) FROM STDIN WITH (FORMAT csv)").format(columns=column_list),
+                    buffer
+                )
+                cur.execute(insert)
+        conn.close()
+        
+        logger.info(f"Successfully copied {len(data)} records to {table_name}")
+    
     def batch_upsert(self, table_name: str, data: List[Dict], conflict_column: str = None):
         """Batch upsert data to Supabase table"""
         try:
@@ -171,14 +253,27 @@ class CSVImporter:
                 logger.warning(f"No data to upsert for table {table_name}")
                 return
             
+            # New players invalidate the cached ID mapping
+            if table_name == 'players':
+                self._player_id_mapping = None
+            
             # Remove None/empty id fields for insert
             clean_data = []
             for row in data:
                 clean_row = {k: v for k, v in row.items() if not (k == 'id' and v is None)}
                 clean_data.append(clean_row)
             
-            # Batch size for upserts
-            batch_size = 200
+            # A direct database connection lets us load everything in one COPY
+            if self.db_url:
+                try:
+                    self.copy_upsert(table_name, clean_data, conflict_column)
+                    return
+                except Exception as e:
+                    logger.warning(f"COPY load into {table_name} failed, falling back to REST upserts: {e}")
+            
+            # Batch size for upserts - PostgREST handles large payloads fine, and
+            # fewer, bigger requests amortize the HTTPS round trip per batch
+            batch_size = 10000
             total_inserted = 0
             
             for i in range(0, len(clean_data), batch_size):
@@ -237,6 +332,28 @@ class CSVImporter:
             # Use composite key for stats tables
             self.batch_upsert(table_name, filtered_data, 'player_id,season')
     
+    def _upsert_zscores_with_bisect(self, stats_table: str, updates: List[Dict], season: str) -> int:
+        """Upsert z-score rows, halving a failing batch until the bad rows are isolated"""
+        if not updates:
+            return 0
+        
+        if len(updates) == 1:
+            update_data = updates[0]
+            try:
+                self.client.table(stats_table).update(update_data).eq('player_id', update_data['player_id']).eq('season', season).execute()
+                return 1
+            except Exception as e:
+                logger.warning(f"Failed to update z-scores for player_id {update_data['player_id']}: {e}")
+                return 0
+        
+        try:
+            self.client.table(stats_table).upsert(updates, on_conflict='player_id,season').execute()
+            return len(updates)
+        except Exception:
+            mid = len(updates) // 2
+            return (self._upsert_zscores_with_bisect(stats_table, updates[:mid], season) +
+                    self._upsert_zscores_with_bisect(stats_table, updates[mid:], season))
+    
     def update_with_zscores(self, stats_table: str, zscore_filename: str):
         """Update existing stats table with z-score data from z-score CSV"""
         logger.info(f"Updating {stats_table} with z-scores from {zscore_filename}...")
@@ -317,16 +434,12 @@ class CSVImporter:
                 logger.info(f"Successfully updated {len(batch_updates)} records in {stats_table} with z-scores")
             except Exception as e:
                 logger.error(f"Failed to batch update z-scores in {stats_table}: {e}")
-                # Fall back to individual updates if batch fails
-                logger.info("Falling back to individual updates...")
-                updates_made = 0
-                for update_data in batch_updates:
-                    try:
-                        result = self.client.table(stats_table).update(update_data).eq('player_id', update_data['player_id']).eq('season', season).execute()
-                        updates_made += 1
-                    except Exception as e2:
-                        logger.warning(f"Failed to update z-scores for player_id {update_data['player_id']}: {e2}")
-                logger.info(f"Updated {updates_made} records individually")
+                # Fall back to splitting the batch so only the failing rows are retried individually
+                logger.info("Falling back to smaller batches...")
+                mid = len(batch_updates) // 2
+                updates_made = (self._upsert_zscores_with_bisect(stats_table, batch_updates[:mid], season) +
+                                self._upsert_zscores_with_bisect(stats_table, batch_updates[mid:], season))
+                logger.info(f"Updated {updates_made} records after splitting the batch")
         else:
             logger.warning(f"No valid z-score data found in {zscore_filename}")
     
@@ -367,7 +480,9 @@ class CSVImporter:
             for subdir_name, subdir_path in self.subdirs.items():
                 subdir_full_path = os.path.join(self.data_dir, subdir_path)
                 if os.path.exists(subdir_full_path):
-                    csv_files = [f for f in os.listdir(subdir_full_path) if f.endswith('.csv')]
+                    # Report gzipped files under their .csv name; read_csv_file resolves the .gz copy
+                    csv_files = sorted({f[:-3] if f.endswith('.csv.gz') else f
+                                        for f in os.listdir(subdir_full_path) if f.endswith(('.csv', '.csv.gz'))})
                     all_files[subdir_name] = csv_files
                     logger.info(f"Found {len(csv_files)} CSV files in {subdir_name}: {csv_files[:3]}{'...' if len(csv_files) > 3 else ''}")
                 else:
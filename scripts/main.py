@@ -6,7 +6,7 @@ import logging
 import os
 import sys
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 # Add scripts directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -14,7 +14,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config import NBA_API_CONFIG, HISTORICAL_CONFIG, LOGGING_CONFIG
 from database import DatabaseManager
 from nba_api_client import NBAApiClient
-from espn_api_client import ESPNFantasyClient
+from espn_api_client import ESPNFantasyClient, ESPNPositionRecord, normalize_player_name
 from zscore_calculator import ZScoreCalculator
 
 # Setup logging
@@ -42,6 +42,7 @@ class NBAStatsCollector:
         self.db = DatabaseManager()
         self.zscore_calc = ZScoreCalculator()
         self._espn_positions_cache = None
+        self._normalized_espn_positions_cache = None
     
     def initialize_database(self):
         """Initialize database connection"""
@@ -52,7 +53,7 @@ class NBAStatsCollector:
             logger.error(f"Failed to initialize database connection: {e}")
             raise
     
-    def get_espn_positions(self) -> Dict[str, List[str]]:
+    def get_espn_positions(self) -> Dict[str, Tuple[str, ...]]:
         """Get ESPN position data and cache it for the session"""
         if self._espn_positions_cache is None:
             try:
@@ -75,33 +76,30 @@ class NBAStatsCollector:
         
         return self._espn_positions_cache
     
+    def get_normalized_espn_positions(self) -> Dict[str, ESPNPositionRecord]:
+        """Get ESPN positions keyed by normalized name and cache it for the session"""
+        if self._normalized_espn_positions_cache is None:
+            # Create normalized name mapping for ESPN data
+            self._normalized_espn_positions_cache = {}
+            for espn_name, positions in self.get_espn_positions().items():
+                normalized_name = self._normalize_player_name(espn_name)
+                self._normalized_espn_positions_cache[normalized_name] = ESPNPositionRecord(espn_name, positions)
+        
+        return self._normalized_espn_positions_cache
+    
     def _normalize_player_name(self, name: str) -> str:
         """Normalize player name for matching (remove accents, lowercase, trim)"""
-        import unicodedata
-        
-        # Remove accents and diacritics
-        normalized = unicodedata.normalize('NFD', name)
-        ascii_name = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
-        
-        # Convert to lowercase and strip whitespace
-        return ascii_name.lower().strip()
+        return normalize_player_name(name)
     
     def enhance_players_with_positions(self, players_data: List[Dict]) -> List[Dict]:
-        """Enhance player data with ESPN positions using normalized name matching"""
+        """Enhance player data (in place) with ESPN positions using normalized name matching"""
         espn_positions = self.get_espn_positions()
-        
-        # Create normalized name mapping for ESPN data
-        normalized_espn_positions = {}
-        for espn_name, positions in espn_positions.items():
-            normalized_name = self._normalize_player_name(espn_name)
-            normalized_espn_positions[normalized_name] = {
-                'original_name': espn_name,
-                'positions': positions
-            }
+        normalized_espn_positions = self.get_normalized_espn_positions()
         
         enhanced_players = []
         for player in players_data:
-            enhanced_player = player.copy()
+            # Positions are added in place - callers don't reuse the raw player rows
+            enhanced_player = player
             player_name = player.get('player_name', '')
             normalized_player_name = self._normalize_player_name(player_name)
             
@@ -112,8 +110,8 @@ class NBAStatsCollector:
             # Try normalized match
             elif normalized_player_name in normalized_espn_positions:
                 match_data = normalized_espn_positions[normalized_player_name]
-                enhanced_player['position'] = match_data['positions']
-                logger.debug(f"Found normalized ESPN match for {player_name} -> {match_data['original_name']}: {match_data['positions']}")
+                enhanced_player['position'] = match_data.positions
+                logger.debug(f"Found normalized ESPN match for {player_name} -> {match_data.original_name}: {match_data.positions}")
             else:
                 # Use intelligent position inference as fallback
                 inferred_positions = self._infer_player_position(player_name, enhanced_player)
@@ -263,11 +261,11 @@ class NBAStatsCollector:
             players_data = self._prepare_players_data(players)
             
             # Save players to database (batch operation)
-            self.db.batch_upsert_players(players_data)
+            upserted_players = self.db.batch_upsert_players(players_data)
             logger.info(f"Saved {len(players_data)} players to database")
             
             # Create player ID mapping for stats tables
-            player_id_map = self._create_player_id_mapping(players_data)
+            player_id_map = self._create_player_id_mapping(players_data, upserted_players)
             
             # Process and save stats with z-scores
             self._process_and_save_stats(season, per_game_stats, 'per_game', player_id_map)
@@ -284,9 +282,9 @@ class NBAStatsCollector:
         """Prepare players data for database insertion"""
         players_data = []
         for player in players:
-            # Format positions as comma-separated string if it's a list
+            # Format positions as comma-separated string if it's a list/tuple
             positions = player.get('position', ['F'])  # Default to Forward if no position
-            if isinstance(positions, list):
+            if isinstance(positions, (list, tuple)):
                 position_str = ','.join(positions)
             else:
                 position_str = str(positions)
@@ -301,18 +299,22 @@ class NBAStatsCollector:
             players_data.append(player_data)
         return players_data
     
-    def _create_player_id_mapping(self, players_data: List[Dict]) -> Dict[int, int]:
+    def _create_player_id_mapping(self, players_data: List[Dict], upserted_players: List[Dict] = None) -> Dict[int, int]:
         """Create mapping from NBA player ID to database player ID"""
         try:
-            # Query the database to get the actual player_id values after insertion
+            # The upsert already returns the stored rows, so resolve IDs from them
+            # and only query the database for players missing from that response
+            player_id_map = {}
+            for player in upserted_players or []:
+                player_id_map[player['nba_player_id']] = player['player_id']
+            
             client = self.db.get_client()
             
-            # Get all players we just inserted/updated
-            nba_player_ids = [player['nba_player_id'] for player in players_data]
+            # Get all players we just inserted/updated that are still unresolved
+            nba_player_ids = [player['nba_player_id'] for player in players_data if player['nba_player_id'] not in player_id_map]
             
             # Process in batches to avoid 414 Request-URI Too Large error
             batch_size = 100  # Process 100 player IDs at a time
-            player_id_map = {}
             
             for i in range(0, len(nba_player_ids), batch_size):
                 batch_ids = nba_player_ids[i:i + batch_size]
@@ -2,7 +2,12 @@
 NBA API client for fetching player statistics
 """
 
+import os
+import gzip
+import hashlib
+import orjson
 import requests
+import threading
 import time
 import logging
 from typing import Dict, List, Optional
@@ -28,32 +33,96 @@ class NBAApiClient:
             'x-nba-stats-origin': 'stats',
             'x-nba-stats-token': 'true'
         })
+        self._rate_limit_lock = threading.Lock()
+        # Caps requests in flight across threads (rate limiting only spaces out their starts)
+        self._request_slots = threading.BoundedSemaphore(self.config.get('max_concurrent_requests', 1))
+        self._next_request_time = 0.0
+    
+    def _wait_for_rate_limit(self):
+        """Space request starts at least rate_limit_delay apart, counting time spent on the previous response"""
+        with self._rate_limit_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            if wait > 0:
+                time.sleep(wait)
+                now += wait
+            self._next_request_time = now + self.config['rate_limit_delay']
+    
+    def _cache_path(self, endpoint: str, params: Dict) -> Optional[str]:
+        """On-disk cache file for a request, or None if the response shouldn't be cached"""
+        cache_dir = self.config.get('cache_dir')
+        # Only finished seasons are cached - the current season's numbers still change
+        if not cache_dir or params.get('Season') in (None, self.config['season']):
+            return None
+        
+        key = hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+        return os.path.join(cache_dir, f"{endpoint}_{params['Season'].replace('-', '_')}_{key}.json.gz")
+    
+    def _read_cache(self, cache_path: str) -> Optional[Dict]:
+        """Load a cached raw response, or None if there isn't a usable one"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with gzip.open(cache_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache file {cache_path}: {e}")
+            return None
+    
+    def _write_cache(self, cache_path: str, content: bytes):
+        """Store a raw response body, atomically so concurrent readers never see a partial file"""
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with gzip.open(temp_path, 'wb', compresslevel=1) as f:
+                f.write(content)
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to cache response at {cache_path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
     
     def _make_request(self, endpoint: str, params: Dict) -> Dict:
         """Make API request with rate limiting and error handling"""
         url = f"{self.BASE_URL}/{endpoint}"
         
+        # Raw responses for finished seasons are reused from disk when a cache_dir is configured
+        cache_path = self._cache_path(endpoint, params)
+        if cache_path:
+            data = self._read_cache(cache_path)
+            if data is not None:
+                logger.debug(f"Loaded cached {endpoint} response for season {params['Season']}")
+                return data
+        
         try:
-            # Rate limiting
-            time.sleep(self.config['rate_limit_delay'])
-            
-            response = self.session.get(
-                url, 
-                params=params, 
-                timeout=self.config['timeout']
-            )
+            with self._request_slots:
+                # Rate limiting
+                self._wait_for_rate_limit()
+                
+                response = self.session.get(
+                    url, 
+                    params=params, 
+                    timeout=self.config['timeout']
+                )
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             logger.debug(f"Successfully fetched data from {endpoint}")
-            return data
             
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed for {endpoint}: {e}")
             raise
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON response from {endpoint}: {e}")
+            raise
         except Exception as e:
             logger.error(f"Unexpected error for {endpoint}: {e}")
             raise
+        
+        # Only a successful, parseable response is ever written to the cache
+        if cache_path:
+            self._write_cache(cache_path, response.content)
+        return data
     
     def get_players_list(self, season: str) -> List[Dict]:
         """Get list of all players for a season"""